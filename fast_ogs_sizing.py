@@ -3,19 +3,57 @@
 Fast OGS Sizing - Uses pre-computed flow data for instant results.
 """
 
+import mmap
 import time
 import numpy as np
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the standard library
+    orjson = None
+
 
 # Pre-load flow data at module import (cold start optimization)
 FLOWS_FILE = Path("calgary_flows_30yr.npy")
 CACHED_FLOWS = None
+SORTED_FLOWS = None
+CUMULATIVE_FLOWS = None
 DT_SECONDS = 3600  # 1-hour intervals
+WET_THRESHOLD = 0.0001  # CMS (0.1 L/s) - lower flows are dry weather
+
+
+def map_npy(path):
+    """
+    Map a .npy file as a read-only array without going through np.load.
+    
+    The header is parsed with np.lib.format (no eval) and the data region is
+    wrapped with np.frombuffer over an mmap - no copy, no file-like chunked
+    reads and no np.memmap subclass.
+    """
+    with open(path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    count = int(np.prod(shape))
+    array = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+    return array.reshape(shape, order='F' if fortran_order else 'C')
 
 
 def load_flows():
-    """Load pre-computed flows (cached after first load)."""
+    """
+    Load pre-computed flows (cached after first load).
+    
+    The file is memory-mapped read-only (see map_npy) rather than copied
+    into RAM; pages are read in on first access and the series is never
+    written. Flows are float32 (as saved by precompute_flows.py); older
+    float64 files are converted on load.
+    """
     global CACHED_FLOWS
     if CACHED_FLOWS is None:
         if not FLOWS_FILE.exists():
@@ -23,15 +61,39 @@ def load_flows():
                 f"Pre-computed flows not found: {FLOWS_FILE}\n"
                 "Run: python precompute_flows.py"
             )
-        CACHED_FLOWS = np.load(FLOWS_FILE)
+        flows = map_npy(FLOWS_FILE)
+        if flows.dtype != np.float32:
+            flows = flows.astype(np.float32)
+        CACHED_FLOWS = flows
     return CACHED_FLOWS
 
 
+def load_distribution():
+    """
+    Sorted non-zero reference flows and their running sum (cached).
+    
+    Scaling by area and imperviousness multiplies every flow by the same
+    positive factor, so the sort order and cumulative-volume fractions are
+    identical for every catchment - only the wet threshold (in reference
+    units) and the flow values change. Both are computed once.
+    """
+    global SORTED_FLOWS, CUMULATIVE_FLOWS
+    if SORTED_FLOWS is None:
+        # Drop the dry (zero) periods before sorting: ~95% of the series is
+        # dry, so one linear mask pass leaves the sort only the wet values
+        flows = load_flows()
+        SORTED_FLOWS = np.sort(flows[flows > 0])
+        CUMULATIVE_FLOWS = np.cumsum(SORTED_FLOWS, dtype=np.float64)
+    return SORTED_FLOWS, CUMULATIVE_FLOWS
+
+
 def calculate_qwq_fast(area_ha=66.0, imperv_pct=55.0, capture_pcts=[50, 75, 80, 90, 95]):
     """
     Calculate Q_wq for given catchment parameters.
     
-    Uses pre-computed flows scaled by catchment characteristics.
+    Uses pre-computed flows scaled by catchment characteristics. The sorted
+    reference distribution is shared by all catchments (see
+    load_distribution), so each call is a handful of binary searches.
     
     Args:
         area_ha: Catchment area in hectares (default: 66 ha)
@@ -45,51 +107,59 @@ def calculate_qwq_fast(area_ha=66.0, imperv_pct=55.0, capture_pcts=[50, 75, 80,
     
     # Load pre-computed flows (for 66 ha, 55% impervious reference catchment)
     base_flows = load_flows()
+    sorted_flows, cumulative_flows = load_distribution()
+    n_flows = len(sorted_flows)
     
     # Scale flows based on area and imperviousness
     # Reference: 66 ha, 55% impervious
     area_factor = area_ha / 66.0
     imperv_factor = imperv_pct / 55.0
     
-    # Simple linear scaling (reasonable approximation)
-    flows = base_flows * area_factor * imperv_factor
-    
-    # Filter dry weather (threshold: 0.0001 CMS = 0.1 L/s)
-    wet_mask = flows > 0.0001
-    wet_flows = flows[wet_mask]
-    
-    if len(wet_flows) == 0:
+    # Simple linear scaling (reasonable approximation); kept in float32 to
+    # match the stored flows
+    scale = np.float32(area_factor * imperv_factor)
+    
+    # Filter dry weather (threshold: 0.0001 CMS = 0.1 L/s): wet flows are the
+    # tail of the sorted reference flows above WET_THRESHOLD / scale. The
+    # search is refined on the scaled values so rounding matches a direct test.
+    start = n_flows
+    if scale > 0:
+        start = int(np.searchsorted(sorted_flows, WET_THRESHOLD / scale, side='right'))
+        while start > 0 and sorted_flows[start - 1] * scale > WET_THRESHOLD:
+            start -= 1
+        while start < n_flows and sorted_flows[start] * scale <= WET_THRESHOLD:
+            start += 1
+    wet_count = n_flows - start
+    
+    if wet_count == 0:
         return {"error": "No wet weather flows found"}
     
-    # Calculate volumes
-    volumes = wet_flows * DT_SECONDS  # m³
-    total_volume = volumes.sum()
-    
-    # Sort flows ascending
-    sorted_indices = np.argsort(wet_flows)
-    sorted_flows = wet_flows[sorted_indices]
-    sorted_volumes = volumes[sorted_indices]
+    # Cumulative volume of the wet tail (reference units; scale cancels out
+    # of the capture fractions)
+    below = cumulative_flows[start - 1] if start > 0 else 0.0
+    wet_total = float(cumulative_flows[-1] - below)
+    total_volume = wet_total * float(scale) * DT_SECONDS  # m³
     
-    # Cumulative volume
-    cumulative_volume = np.cumsum(sorted_volumes)
-    cumulative_pct = cumulative_volume / total_volume * 100
+    # Find Q_wq at each capture percentage (one vectorized search)
+    targets = below + wet_total * np.asarray(capture_pcts, dtype=np.float64) / 100
+    idxs = np.clip(np.searchsorted(cumulative_flows, targets), start, n_flows - 1)
+    capture_flows = dict(zip(capture_pcts, (sorted_flows[idxs] * scale).tolist()))
     
-    # Find Q_wq at each capture percentage
-    capture_flows = {}
-    for pct in capture_pcts:
-        idx = np.searchsorted(cumulative_pct, pct)
-        if idx >= len(sorted_flows):
-            idx = len(sorted_flows) - 1
-        capture_flows[pct] = float(sorted_flows[idx])
+    # Min, max and the two middle-ranked flows (the same one for odd counts),
+    # scaled and converted to Python floats together
+    mid = start + wet_count // 2
+    min_flow, max_flow, median_lo, median_hi = (
+        sorted_flows[[start, n_flows - 1, mid - (wet_count % 2 == 0), mid]] * scale
+    ).tolist()
     
     t_process = time.perf_counter() - t_start
     
     return {
         "q_wq_90_cms": capture_flows.get(90, 0),
         "q_wq_90_lps": capture_flows.get(90, 0) * 1000,
-        "total_volume_m3": float(total_volume),
-        "wet_periods": int(wet_mask.sum()),
-        "dry_periods": int((~wet_mask).sum()),
+        "total_volume_m3": total_volume,
+        "wet_periods": wet_count,
+        "dry_periods": base_flows.size - wet_count,
         "capture_flows": capture_flows,
         "input_params": {
             "area_ha": area_ha,
@@ -99,18 +169,31 @@ def calculate_qwq_fast(area_ha=66.0, imperv_pct=55.0, capture_pcts=[50, 75, 80,
             "process_seconds": t_process
         },
         "stats": {
-            "min_flow_cms": float(wet_flows.min()),
-            "max_flow_cms": float(wet_flows.max()),
-            "mean_flow_cms": float(wet_flows.mean()),
-            "median_flow_cms": float(np.median(wet_flows))
+            "min_flow_cms": min_flow,
+            "max_flow_cms": max_flow,
+            "mean_flow_cms": total_volume / DT_SECONDS / wet_count,
+            "median_flow_cms": (median_lo + median_hi) / 2
         }
     }
 
 
+def dumps_json(obj):
+    """
+    Serialize a result dict as indented JSON.
+    
+    Uses orjson when installed (numpy scalars and the integer capture_flows
+    keys are handled natively), otherwise json with numpy values as floats.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, option=option).decode()
+    
+    import json
+    return json.dumps(obj, indent=2, default=float)
+
+
 def main():
     """Quick test of fast OGS sizing."""
-    import json
-    
     print("=" * 70)
     print("FAST OGS SIZING (Pre-computed Flows)")
     print("=" * 70)
@@ -129,7 +212,7 @@ def main():
         print(f"  {pct}%: {flow:.4f} CMS ({flow*1000:.1f} L/s){marker}")
     
     print("\n[JSON OUTPUT]")
-    print(json.dumps(result, indent=2))
+    print(dumps_json(result))
     
     # Test with different catchment sizes
     print("\n" + "=" * 70)
@@ -35,18 +35,40 @@ def get_swmm_output_module():
         )
 
 
-def find_link_index(handle, output, shared_enum, link_id: str) -> int:
+def link_index_map(handle, output, shared_enum, n_links: int | None = None) -> dict[str, int]:
     """
-    Find the index of a link by its ID/name.
+    Map every link ID/name in an open output file to its index.
     
-    swmm-toolkit doesn't provide a direct get_link_index() function,
-    so we iterate through all links to find the matching name.
+    swmm-toolkit doesn't provide a direct get_link_index() function, so the
+    names are read once, in a single pass; callers looking up several links
+    should build the map once and reuse it.
+    
+    Args:
+        handle: SWMM output handle
+        output: swmm.toolkit.output module
+        shared_enum: swmm.toolkit.shared_enum module
+        n_links: Number of links, if the caller already has it from
+            get_proj_size (otherwise it is queried)
+        
+    Returns:
+        Dictionary of link name -> link index (0-based)
+    """
+    link_type = shared_enum.ElementType.LINK
+    if n_links is None:
+        n_links = output.get_proj_size(handle)[link_type]
+    return {output.get_elem_name(handle, link_type, idx): idx for idx in range(n_links)}
+
+
+def find_link_index(handle, output, shared_enum, link_id: str, n_links: int | None = None) -> int:
+    """
+    Find the index of a link by its ID/name.
     
     Args:
         handle: SWMM output handle
         output: swmm.toolkit.output module
         shared_enum: swmm.toolkit.shared_enum module
         link_id: The link ID to find
+        n_links: Number of links, if already known (see link_index_map)
         
     Returns:
         Link index (0-based)
@@ -54,20 +76,12 @@ def find_link_index(handle, output, shared_enum, link_id: str) -> int:
     Raises:
         ValueError: If link not found
     """
-    # Get project size to find number of links
-    proj_size = output.get_proj_size(handle)
-    n_links = proj_size[shared_enum.ElementType.LINK]
-    
-    # Search for the link by name
-    for idx in range(n_links):
-        name = output.get_elem_name(handle, shared_enum.ElementType.LINK, idx)
-        if name == link_id:
-            return idx
+    link_indices = link_index_map(handle, output, shared_enum, n_links)
+    if link_id in link_indices:
+        return link_indices[link_id]
     
     # If not found, list available links for debugging
-    available_links = []
-    for idx in range(min(n_links, 10)):  # First 10 links
-        available_links.append(output.get_elem_name(handle, shared_enum.ElementType.LINK, idx))
+    available_links = list(link_indices)[:10]  # First 10 links
     
     raise ValueError(
         f"Link '{link_id}' not found in output file. "
@@ -77,14 +91,21 @@ def find_link_index(handle, output, shared_enum, link_id: str) -> int:
 
 def read_link_flow_series(
     outfile_path: str, 
-    link_id: str
+    link_id: str,
+    start_period: int = 0,
+    end_period: int | None = None
 ) -> tuple[np.ndarray, float]:
     """
     Read flow time series for a specific link from SWMM binary output.
     
+    Only the requested window of reporting periods is read from the file,
+    so callers wanting a subset (e.g. one year) don't load and then slice.
+    
     Args:
         outfile_path: Path to .out file
         link_id: SWMM link identifier
+        start_period: First reporting period to read (0-indexed)
+        end_period: Last reporting period to read (inclusive; default: last)
         
     Returns:
         Tuple of (flow_rates, report_step_seconds)
@@ -101,7 +122,7 @@ def read_link_flow_series(
         # Get project size info
         proj_size = output.get_proj_size(handle)
         n_links = proj_size[shared_enum.ElementType.LINK]
-        n_periods = proj_size[4]  # PERIODS is index 4
+        n_periods = output.get_times(handle, shared_enum.Time.NUM_PERIODS)
         logger.info(f"  Total links: {n_links}, Total periods: {n_periods:,}")
         
         # Check if output has data
@@ -111,25 +132,37 @@ def read_link_flow_series(
                 "Check SWMM report settings or simulation errors in .rpt file."
             )
         
+        if end_period is None:
+            end_period = n_periods - 1
+        if not 0 <= start_period <= end_period < n_periods:
+            raise ValueError(
+                f"Invalid period window {start_period}-{end_period} "
+                f"for output with {n_periods:,} periods"
+            )
+        
         # Find link index by name
-        link_index = find_link_index(handle, output, shared_enum, link_id)
+        link_index = find_link_index(handle, output, shared_enum, link_id, n_links)
         logger.info(f"  Link '{link_id}' found at index: {link_index}")
         
         # Get report step duration in seconds
         report_step_sec = output.get_times(handle, shared_enum.Time.REPORT_STEP)
         
-        # Get the full flow series for the link
+        # Get the flow series for the link over the requested window
         # LinkAttribute.FLOW_RATE = 0
         flow_series = output.get_link_series(
             handle, 
             link_index, 
             shared_enum.LinkAttribute.FLOW_RATE,
-            0,              # Start period (0-indexed)
-            n_periods - 1   # End period (inclusive)
+            start_period,   # Start period (0-indexed)
+            end_period      # End period (inclusive)
         )
         
-        # Convert to numpy array for vectorized operations
-        flows = np.array(flow_series, dtype=np.float64)
+        # Convert to numpy array for vectorized operations. SWMM stores
+        # results as 32-bit floats, so float32 loses nothing and halves the
+        # bytes every later pass moves
+        flows = np.fromiter(
+            flow_series, dtype=np.float32, count=end_period - start_period + 1
+        )
         
         return flows, float(report_step_sec)
         
@@ -138,6 +171,33 @@ def read_link_flow_series(
             output.close(handle)
 
 
+def resample_hourly(flows: np.ndarray, dt_seconds: float) -> np.ndarray:
+    """
+    Convert a flow series at a sub-hourly report step to hourly means.
+    
+    The pre-computed flows used by fast_ogs_sizing are hourly. The strided
+    grouping and the mean run as one reshape-mean over the whole series; a
+    trailing partial hour is dropped. At an hourly report step the input is
+    returned as is.
+    
+    Args:
+        flows: Array of flow magnitudes (CMS) at the report step
+        dt_seconds: Report step duration in seconds (must divide one hour)
+        
+    Returns:
+        Array of hourly mean flow magnitudes (CMS)
+    """
+    steps_per_hour = int(round(3600 / dt_seconds))
+    if steps_per_hour < 1 or steps_per_hour * dt_seconds != 3600:
+        raise ValueError(f"Report step of {dt_seconds:.0f} s does not divide one hour")
+    if steps_per_hour == 1:
+        return flows
+    
+    n_hours = len(flows) // steps_per_hour
+    hourly = flows[:n_hours * steps_per_hour].reshape(n_hours, steps_per_hour)
+    return hourly.mean(axis=1, dtype=np.float64).astype(flows.dtype)
+
+
 def calculate_qwq(
     flows: np.ndarray, 
     dt_seconds: float,
@@ -149,10 +209,9 @@ def calculate_qwq(
     
     The algorithm:
     1. Filter out dry weather (zero/low) flows
-    2. Calculate volume = flow * time_step for each period
-    3. Sort flows from low to high
-    4. Calculate cumulative volume
-    5. Find flow rate at each target capture percentage
+    2. Sort flows from low to high
+    3. Calculate cumulative volume (cumulative flow * time_step)
+    4. Find flow rate at each target capture percentage
     
     Args:
         flows: Array of flow rates (CMS)
@@ -163,51 +222,47 @@ def calculate_qwq(
     Returns:
         Dictionary with results including Q_wq values and stats
     """
-    # Filter out dry weather flows (below threshold)
-    wet_mask = flows > flow_threshold
-    wet_flows = flows[wet_mask]
+    # Filter out dry weather flows (below threshold); the mask is used once
+    # and the dry count follows from the wet one
+    wet_flows = flows[flows > flow_threshold]
+    n_wet = wet_flows.size
+    n_dry = flows.size - n_wet
     
-    if len(wet_flows) == 0:
+    if n_wet == 0:
         raise ValueError("No wet weather flows found above threshold")
     
-    # Calculate volumes (CMS * seconds = cubic meters)
-    volumes = wet_flows * dt_seconds
-    
-    # Sort flows from low to high for cumulative analysis
-    # We need to sort both flows and their corresponding volumes together
-    sort_indices = np.argsort(wet_flows)
-    sorted_flows = wet_flows[sort_indices]
-    sorted_volumes = volumes[sort_indices]
+    # Sort wet flows in place (fresh copy from the mask)
+    sorted_flows = wet_flows
+    sorted_flows.sort()
     
-    # Calculate cumulative volume from low flows to high flows
-    cumulative_volume = np.cumsum(sorted_volumes)
-    total_volume = cumulative_volume[-1]
+    # Cumulative flow from low to high, summed in float64
+    cumulative_flow = np.cumsum(sorted_flows, dtype=np.float64)
+    total_flow = cumulative_flow[-1]
+    total_volume = total_flow * dt_seconds
     
-    # Calculate cumulative percentage
-    cumulative_pct = (cumulative_volume / total_volume) * 100
+    # The two middle-ranked flows (the same one for odd counts) for the median
+    median_lo, median_hi = sorted_flows[[(n_wet - 1) // 2, n_wet // 2]].tolist()
     
     # Find Q_wq for each capture percentage
     results = {
         'total_volume_m3': total_volume,
-        'total_wet_periods': len(wet_flows),
-        'total_dry_periods': int(np.sum(~wet_mask)),
+        'total_wet_periods': n_wet,
+        'total_dry_periods': n_dry,
         'capture_flows': {},
+        # Stats from the sorted wet flows
         'stats': {
-            'min_flow_cms': float(np.min(wet_flows)),
-            'max_flow_cms': float(np.max(wet_flows)),
-            'mean_flow_cms': float(np.mean(wet_flows)),
-            'median_flow_cms': float(np.median(wet_flows)),
+            'min_flow_cms': float(sorted_flows[0]),
+            'max_flow_cms': float(sorted_flows[-1]),
+            'mean_flow_cms': float(total_flow / n_wet),
+            'median_flow_cms': (median_lo + median_hi) / 2,
         }
     }
     
-    for pct in capture_pcts:
-        # Find index where cumulative percentage first reaches target
-        idx = np.searchsorted(cumulative_pct, pct)
-        if idx >= len(sorted_flows):
-            idx = len(sorted_flows) - 1
-        
-        q_wq = sorted_flows[idx]
-        results['capture_flows'][pct] = float(q_wq)
+    # Capture targets in cumulative-flow units; one searchsorted for all percentages
+    targets = np.asarray(capture_pcts, dtype=np.float64) / 100 * total_flow
+    idxs = np.searchsorted(cumulative_flow, targets)
+    np.minimum(idxs, n_wet - 1, out=idxs)
+    results['capture_flows'] = dict(zip(capture_pcts, sorted_flows[idxs].tolist()))
     
     return results
 
@@ -293,16 +348,16 @@ def main():
     print("  CAPTURE RATE  |  Q_wq (Flow Rate)")
     print("=" * 60)
     
+    # Format each flow once; the 90% line below reuses its string
+    formatted = {pct: format_flow(q_wq) for pct, q_wq in results['capture_flows'].items()}
     for pct in CAPTURE_PERCENTAGES:
-        q_wq = results['capture_flows'][pct]
         marker = " <<<" if pct == 90 else ""
-        print(f"      {pct:3d}%      |  {format_flow(q_wq)}{marker}")
+        print(f"      {pct:3d}%      |  {formatted[pct]}{marker}")
     
     print("=" * 60)
     
     # Highlight the target 90% Q_wq
-    q_wq_90 = results['capture_flows'][90]
-    print(f"\n>>> WATER QUALITY FLOW RATE (90% capture): {format_flow(q_wq_90)}")
+    print(f"\n>>> WATER QUALITY FLOW RATE (90% capture): {formatted[90]}")
     print(f">>> This flow treats 90% of the total {results['total_volume_m3']:,.0f} m³ runoff\n")
     
     # =========================================================================
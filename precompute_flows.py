@@ -34,35 +34,23 @@ def precompute_flows():
     print(f"\nRunning 30-year SWMM simulation...")
     t_start = time.perf_counter()
     
-    from pyswmm import Simulation, Links
+    from ogs_sizing import read_link_flow_series, resample_hourly
+    from run_simulation import run_swmm
     
-    flow_data = []
-    
-    with Simulation(str(inp_file)) as sim:
-        link = Links(sim)["Link_1"]
-        print(f"Found Link_1: {link.linkid}")
-        
-        step_count = 0
-        last_hour = -1
-        
-        for step in sim:
-            step_count += 1
-            current_hour = sim.current_time.hour + (sim.current_time.day - 1) * 24
-            
-            if current_hour != last_hour:
-                flow_cms = abs(link.flow)
-                flow_data.append(flow_cms)
-                last_hour = current_hour
-                
-                if len(flow_data) % 50000 == 0:
-                    print(f"  Captured {len(flow_data):,} flow records...")
+    run_swmm(inp_file, rpt_file, out_file)
     
     t_sim = time.perf_counter() - t_start
     print(f"\n>>> SIMULATION TIME: {t_sim:.1f} seconds <<<")
-    print(f">>> Flow records: {len(flow_data):,} <<<")
     
-    # Save to numpy file
-    flows = np.array(flow_data, dtype=np.float32)
+    # Read the whole Link_1 series from the binary output in one call, take
+    # magnitudes in place and reduce to hourly (a no-op at the model's hourly
+    # REPORT_STEP)
+    flows, dt_seconds = read_link_flow_series(str(out_file), "Link_1")
+    np.abs(flows, out=flows)
+    flows = resample_hourly(flows, dt_seconds)
+    print(f">>> Flow records: {len(flows):,} <<<")
+    
+    # Save to numpy file as float32 (the dtype fast_ogs_sizing streams)
     output_file = Path("calgary_flows_30yr.npy")
     np.save(output_file, flows)
     
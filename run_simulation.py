@@ -11,11 +11,67 @@ Prerequisites:
     pip install swmm-toolkit numpy
 """
 
+import os
 import time
 import sys
 from pathlib import Path
 
 
+def print_report_tail(rpt_file, n_lines=30, block_size=16384):
+    """
+    Print the last lines of a SWMM report file (where SWMM writes its errors).
+    
+    Reports with full time-series tables run to hundreds of MB, so the file
+    is read from the end: a block_size window, doubled until it holds
+    n_lines complete lines. Only that window is read.
+    """
+    rpt_file = Path(rpt_file)
+    if not rpt_file.exists():
+        return
+    size = rpt_file.stat().st_size
+    
+    with open(rpt_file, 'rb') as f:
+        window = block_size
+        while True:
+            f.seek(max(0, size - window))
+            tail = f.read()
+            if window >= size or tail.count(b"\n") > n_lines:
+                break
+            window *= 2
+    
+    print(f"\nLast {n_lines} lines of {rpt_file}:")
+    for line in tail.splitlines()[-n_lines:]:
+        print(line.decode(errors='replace'))
+
+
+def run_swmm(inp_file, rpt_file, out_file):
+    """
+    Run SWMM into out_file via a .tmp file renamed into place on success.
+    
+    On failure the .tmp is left behind and the report tail is printed.
+    """
+    from swmm.toolkit import solver
+    
+    tmp_out = f"{out_file}.tmp"
+    try:
+        solver.swmm_open(str(inp_file), str(rpt_file), tmp_out)
+        solver.swmm_start(True)
+        # Stepped directly: swmm_run prints a progress line per simulated hour
+        while solver.swmm_step() != 0:
+            pass
+        solver.swmm_end()
+        solver.swmm_close()
+    except Exception:
+        # Closing flushes SWMM's error messages to the report
+        try:
+            solver.swmm_close()
+        except Exception:
+            pass
+        print_report_tail(rpt_file)
+        raise
+    os.replace(tmp_out, out_file)
+
+
 def main():
     print("=" * 60)
     print("CALGARY SWMM CONTINUOUS SIMULATION")
@@ -57,10 +113,8 @@ def main():
     t_start = time.perf_counter()
     
     try:
-        from swmm.toolkit import solver
-        
         # Run the simulation
-        solver.swmm_run(
+        run_swmm(
             "calgary_model.inp",
             "calgary_model.rpt", 
             "model_run.out"